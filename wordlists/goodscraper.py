@@ -7,6 +7,18 @@ Usage:
     python goodscraper.py 162248230 > books.json
     python goodscraper.py "https://www.goodreads.com/review/list/162248230?shelf=read" > books.json
     python goodscraper.py "Noah-read-shelf.html" > books.json
+    python goodscraper.py --no-cache 162248230 > books.json
+    python goodscraper.py --utf8 162248230 > books.json
+
+The JSON is pure ASCII by default (non-ASCII is written as \\uXXXX escapes),
+so it survives shell redirection on any console code page. --utf8 writes
+raw UTF-8 instead (through orjson when it is installed); only use it where
+stdout isn't re-encoded, e.g. not with Windows PowerShell 5.1's ">".
+
+Needs lxml (and requests to fetch from goodreads.com):
+    pip install lxml requests
+    pip install brotli    # optional, smaller responses
+    pip install orjson    # optional, faster --utf8 output
 """
 
 import argparse
@@ -15,17 +27,125 @@ import json
 import os
 import re
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import takewhile
+from typing import NamedTuple
 from urllib.parse import urljoin, urlparse, parse_qsl, urlencode, urlunparse
 
-from bs4 import BeautifulSoup
+import lxml.etree
+import lxml.html
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 try:
     import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util import Retry
+    from urllib3.util.request import ACCEPT_ENCODING
 except ImportError:
     requests = None
 
 GOODREADS_BASE = "https://www.goodreads.com"
 
+#goodreads pages (and saved copies of them) are utf-8
+_HTML_PARSER = lxml.html.HTMLParser(encoding="utf-8")
+
+#compiled once, each column is pulled out of the whole page in one pass
+#(see _column) instead of searching row by row. no "//" after the first
+#step: tr//td or td//a makes libxml2 merge and de-dupe node sets, which gets
+#quadratically slower as the shelf grows, so use tr/td and descendant::
+_ROWS_XP = lxml.etree.XPath("//tr[contains(@class,'bookalike')]")
+_TITLE_LINKS_XP = lxml.etree.XPath(
+    "//tr[contains(@class,'bookalike')]/td[contains(@class,'field title')]/descendant::a[@href]")
+_AUTHOR_TDS_XP = lxml.etree.XPath(
+    "//tr[contains(@class,'bookalike')]/td[contains(@class,'field author')]")
+_COVER_IMGS_XP = lxml.etree.XPath(
+    "//tr[contains(@class,'bookalike')]/td[contains(@class,'field cover')]/descendant::img")
+_PAGES_TDS_XP = lxml.etree.XPath(
+    "//tr[contains(@class,'bookalike')]/td[contains(@class,'field num_pages')]")
+_DATE_PUB_TDS_XP = lxml.etree.XPath(
+    "//tr[contains(@class,'bookalike')]/td[contains(@class,'field date_pub')]")
+_LINKS_XP = lxml.etree.XPath(".//a")
+_STATUS_XP = lxml.etree.XPath("//*[@id='infiniteStatus']")
+
+#regexes hit once per book, compile them up front
+_EXT_ID_RE = re.compile(r"/book/show/(\d+)")
+_TOTAL_RE = re.compile(r"of\s+(\d[\d,]*)")
+_SY_SIZE_RE = re.compile(r"\._SY\d+_")
+_SX_SIZE_RE = re.compile(r"\._SX\d+_")
+_GR_ASSETS_RE = re.compile(r"i\.gr-assets\.com")
+
+#fetched pages are kept here so re-runs don't hammer goodreads (see --no-cache)
+CACHE_DIR = ".goodreads_cache"
+CACHE_MAX_AGE = 24 * 60 * 60
+
+#how many shelf pages to fetch at once, keep it small or goodreads starts 403ing
+PAGE_WORKERS = 4
+
+#one session for every page so the TCP/TLS connection to goodreads is reused
+_SESSION = None
+if requests:
+    _SESSION = requests.Session()
+    _SESSION.headers.update({
+        #act as a normal chromium browser on windows
+        "User-Agent": (
+            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+            "AppleWebKit/537.36 (KHTML, like Gecko) "
+            "Chrome/120.0.0.0 Safari/537.36"
+        ),
+        "Accept": (
+            "text/html,application/xhtml+xml,application/xml;"
+            "q=0.9,image/avif,image/webp,*/*;q=0.8"
+        ),
+        "Accept-Language": "en-US,en;q=0.9",
+        #gzip/deflate plus br/zstd when brotli/zstandard are installed,
+        #never advertise an encoding requests can't decode for us
+        "Accept-Encoding": ACCEPT_ENCODING,
+        "Referer": "https://www.goodreads.com/",
+    })
+    #goodreads 403s/429s scrapers in bursts, so retry with backoff (sleeps of
+    #0, 2, 4, 8, 16s, so a page that stays blocked costs ~30s before the error)
+    #then hand the last response back so we can report it. urllib3 only honours
+    #Retry-After on 413/429/503, 403s just get the plain backoff
+    _SESSION.mount("https://", HTTPAdapter(
+        #one kept-alive connection per page worker; pool_block makes a worker
+        #wait for a free pooled connection instead of opening a throwaway one
+        pool_connections=1,
+        pool_maxsize=PAGE_WORKERS,
+        pool_block=True,
+        max_retries=Retry(
+            total=5,
+            backoff_factor=1.0,
+            status_forcelist=[403, 429, 500, 502, 503, 504],
+            allowed_methods=["GET"],
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        ),
+    ))
+
+
+class Book(NamedTuple):
+    """
+    One shelf row, field names match my curr Book entity
+    (and the JSON keys, via _asdict()).
+    """
+    #keyHash: str                  #see compute_key_hash
+    source: str                    #BookSource.OTHER (our enum doesn't include goodreads)
+    #externalId: str | None        #goodreads numeric id
+    title: str
+    authors: list[str] | None
+    #publishedYear: int | None
+    pageCount: int | None
+    #publisher: str | None         #would need to grab for other page
+    #categories: list[str] | None  #would need to grab for other page
+    coverUrl: str | None
+    #goodreadsUrl: str
+
 
 def resolve_input(arg: str) -> str:
     """
@@ -51,19 +171,35 @@ def resolve_input(arg: str) -> str:
     return arg
 
 
-def load_html(path_or_url: str) -> str:
+def _cache_path(url: str) -> str:
+    return os.path.join(CACHE_DIR, hashlib.sha256(url.encode("utf-8")).hexdigest() + ".html")
+
+
+def load_html(path_or_url: str, use_cache: bool = True) -> bytes:
     """
-    Load HTML from a local file or via HTTP.
+    Load raw HTML bytes from a local file or via HTTP.
 
     - If it's a file on disk, just open it.
-    - If it's a URL, send a browser-y User-Agent so Goodreads
+    - If it's a URL we fetched less than CACHE_MAX_AGE ago, reuse
+      the copy in CACHE_DIR (unless use_cache is False).
+    - Otherwise send a browser-y User-Agent so Goodreads
       is less likely to block us with 403.
     """
     # Local file?
     if os.path.exists(path_or_url):
-        with open(path_or_url, "r", encoding="utf-8") as f:
+        with open(path_or_url, "rb") as f:
             return f.read()
 
+    # Fetched recently?
+    cache_path = _cache_path(path_or_url)
+    if use_cache:
+        try:
+            if time.time() - os.path.getmtime(cache_path) < CACHE_MAX_AGE:
+                with open(cache_path, "rb") as f:
+                    return f.read()
+        except OSError:
+            pass
+
     # Not a file -> treat as URL
     if not requests:
         raise RuntimeError(
@@ -71,22 +207,7 @@ def load_html(path_or_url: str) -> str:
             "Install with: pip install requests"
         )
 
-    headers = {
-        #act as a normal chromium browser on windows
-        "User-Agent": (
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/120.0.0.0 Safari/537.36"
-        ),
-        "Accept": (
-            "text/html,application/xhtml+xml,application/xml;"
-            "q=0.9,image/avif,image/webp,*/*;q=0.8"
-        ),
-        "Accept-Language": "en-US,en;q=0.9",
-        "Referer": "https://www.goodreads.com/",
-    }
-
-    resp = requests.get(path_or_url, headers=headers)
+    resp = _SESSION.get(path_or_url, timeout=20)
     try:
         resp.raise_for_status()
     except requests.HTTPError as e:
@@ -98,10 +219,21 @@ def load_html(path_or_url: str) -> str:
             "  - Workaround: open the page in your browser while logged in,\n"
             "    then File -> Save Page As... (HTML only) and run this script\n"
             "    on the saved .html file instead.\n"
+            f"Pages fetched before this are cached in {CACHE_DIR},\n"
+            "so re-running picks up where this left off.\n"
         )
         raise SystemExit(msg) from e
 
-    return resp.text
+    #write then rename so a half written file never gets read back, the temp
+    #name is unique per process + thread so concurrent runs never share one
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(resp.content)
+    os.replace(tmp_path, cache_path)
+
+    #raw bytes, lxml decodes them itself so we skip building a str first
+    return resp.content
 
 
 def extract_external_id(book_href: str) -> str | None:
@@ -115,7 +247,7 @@ def extract_external_id(book_href: str) -> str | None:
         return None
 
     path = urlparse(book_href).path
-    m = re.search(r"/book/show/(\d+)", path)
+    m = _EXT_ID_RE.search(path)
     if m:
         return m.group(1)
     return None
@@ -124,13 +256,12 @@ def extract_external_id(book_href: str) -> str | None:
 def extract_int_from_text(text: str | None) -> int | None:
     if not text:
         return None
-    digits = re.findall(r"\d+", text.replace(",", ""))
-    if not digits:
-        return None
-    try:
-        return int(digits[0])
-    except ValueError:
-        return None
+    text = text.replace(",", "")
+    #first run of digits, e.g. "1352 pp" -> 1352
+    for i, c in enumerate(text):
+        if c.isdecimal():
+            return int("".join(takewhile(str.isdecimal, text[i:])))
+    return None
 
 
 def extract_year_from_date(text: str | None) -> int | None:
@@ -140,12 +271,9 @@ def extract_year_from_date(text: str | None) -> int | None:
     """
     if not text:
         return None
-    m = re.search(r"(\d{4})", text)
-    if m:
-        try:
-            return int(m.group(1))
-        except ValueError:
-            return None
+    year = text.rsplit(None, 1)[-1]
+    if len(year) == 4 and year.isdecimal():
+        return int(year)
     return None
 
 
@@ -165,28 +293,84 @@ def compute_key_hash(source: str, external_id: str | None,
     return hashlib.sha256(raw.encode("utf-8")).hexdigest()
 
 
-def parse_shelf(html: str, shelf_url: str | None = None) -> list[dict]:
+def _text(el, sep: str = "") -> str:
     """
-    Parse the Goodreads shelf HTML and return a list of dicts
+    Same as BeautifulSoup's get_text(sep, strip=True) for an lxml element.
+    """
+    return sep.join(t.strip() for t in el.itertext() if t.strip())
+
+
+def extract_shelf_total(doc) -> int | None:
+    """
+    Goodreads shelf pages have a status line like "10 of 237 loaded".
+    Pull out the total (237) so we know how many pages there are.
+    """
+    status = _STATUS_XP(doc)
+    if not status:
+        return None
+    m = _TOTAL_RE.search(_text(status[0], " "))
+    if m:
+        return int(m.group(1).replace(",", ""))
+    return None
+
+
+def _column(doc, xpath, row_index: dict) -> list:
+    """
+    Run one whole-page XPath and line the hits up with the shelf rows:
+    the first hit inside each row, or None if that row has none.
+    """
+    col = [None] * len(row_index)
+    for el in xpath(doc):
+        i = row_index.get(next(el.iterancestors("tr"), None))
+        if i is not None and col[i] is None:
+            col[i] = el
+    return col
+
+
+def parse_shelf(html: str | bytes, shelf_url: str | None = None,
+                return_total: bool = False):
+    """
+    Parse the Goodreads shelf HTML and return a list of Book records
     that map cleanly onto my curr Book entity.
+
+    With return_total=True returns (books, total) instead, where total
+    is the shelf size from extract_shelf_total().
     """
-    soup = BeautifulSoup(html, "html.parser")
+    #the parser is pinned to utf-8 anyway, and lxml refuses a str that starts
+    #with an <?xml ... encoding=...?> declaration
+    if isinstance(html, str):
+        html = html.encode("utf-8")
 
-    books: list[dict] = []
+    try:
+        doc = lxml.html.fromstring(html, parser=_HTML_PARSER)
+    except lxml.etree.ParserError:
+        #no elements at all (empty, whitespace, only comments): empty shelf
+        return ([], None) if return_total else []
+
+    #one list per output field, zipped into Book records at the end
+    sources: list[str] = []
+    titles: list[str] = []
+    authors_col: list[list[str] | None] = []
+    page_counts: list[int | None] = []
+    cover_urls: list[str | None] = []
 
     #<tr id="review_xxx" class="bookalike review"> ... </tr>
-    for row in soup.find_all("tr", class_="bookalike"):
-        #title/book/externalid
-        title_td = row.find("td", class_="field title")
-        if not title_td:
-            continue
+    row_index = {row: i for i, row in enumerate(_ROWS_XP(doc))}
+    columns = zip(
+        _column(doc, _TITLE_LINKS_XP, row_index),
+        _column(doc, _AUTHOR_TDS_XP, row_index),
+        _column(doc, _COVER_IMGS_XP, row_index),
+        _column(doc, _PAGES_TDS_XP, row_index),
+        _column(doc, _DATE_PUB_TDS_XP, row_index),
+    )
 
-        title_link = title_td.find("a", href=True)
-        if not title_link:
+    for title_link, author_td, img, pages_td, date_pub_td in columns:
+        #title/book/externalid
+        if title_link is None:
             continue
 
-        title = title_link.get_text(strip=True)
-        book_href = title_link["href"]
+        title = _text(title_link)
+        book_href = title_link.get("href")
         if shelf_url and not book_href.startswith("http"):
             book_url = urljoin(GOODREADS_BASE, book_href)
         else:
@@ -195,77 +379,85 @@ def parse_shelf(html: str, shelf_url: str | None = None) -> list[dict]:
         external_id = extract_external_id(book_href)
 
         #author
-        author_td = row.find("td", class_="field author")
         authors: list[str] | None = None
-        if author_td:
-            author_links = author_td.find_all("a")
+        if author_td is not None:
+            author_links = _LINKS_XP(author_td)
             if author_links:
-                authors = [a.get_text(strip=True) for a in author_links]
+                authors = [_text(a) for a in author_links]
             else:
-                text = author_td.get_text(strip=True)
+                text = _text(author_td)
                 if text:
                     authors = [text] 
 
         #cover url (image)
-        cover_td = row.find("td", class_="field cover")
         cover_url = None
-        if cover_td:
-            img = cover_td.find("img")
-            if img and img.get("src"):
-                compressed_url = img["src"]
+        if img is not None:
+            if img.get("src"):
+                compressed_url = img.get("src")
                 #get larger image by removing "._SY75_" or other size suffix
                 #also remove i.gr-assets.com and replace with m.media-amazon.com
-                cover_url = re.sub(r"\._SY\d+_", "", compressed_url)
+                cover_url = _SY_SIZE_RE.sub("", compressed_url)
                 #also get ride of ._SX50_ 
-                cover_url = re.sub(r"\._SX\d+_", "", cover_url)
-                cover_url = re.sub(r"i\.gr-assets\.com", "m.media-amazon.com", cover_url)
-            elif img and img.get("data-src"):
+                cover_url = _SX_SIZE_RE.sub("", cover_url)
+                cover_url = _GR_ASSETS_RE.sub("m.media-amazon.com", cover_url)
+            elif img.get("data-src"):
                 #lazy loaded images use data-src
-                cover_url = img["src"]
+                cover_url = img.get("src")
 
         #page count
-        pages_td = row.find("td", class_="field num_pages")
         page_count = None
-        if pages_td:
-            text = pages_td.get_text(" ", strip=True)
+        if pages_td is not None:
+            text = _text(pages_td, " ")
             page_count = extract_int_from_text(text)
 
         #year published
-        date_pub_td = row.find("td", class_="field date_pub")
         published_year = None
-        if date_pub_td:
-            text = date_pub_td.get_text(" ", strip=True)
+        if date_pub_td is not None:
+            text = _text(date_pub_td, " ")
             published_year = extract_year_from_date(text)
 
         # Map Goodreads to your BookSource enum; probably OTHER in your system
         source = "OTHER"
 
-        key_hash = compute_key_hash(
-            source=source,
-            external_id=external_id,
-            title=title,
-            authors=authors,
-        )
+        #only needed for keyHash (commented out in Book), no point hashing every book otherwise
+        #key_hash = compute_key_hash(
+        #    source=source,
+        #    external_id=external_id,
+        #    title=title,
+        #    authors=authors,
+        #)
+
+        sources.append(source)
+        titles.append(title)
+        authors_col.append(authors)
+        page_counts.append(page_count)
+        cover_urls.append(cover_url)
 
-        book_obj = {
-            #"keyHash": key_hash,
-            "source": source,              #BookSource.OTHER (our enum doesn't include goodreads)
-            #"externalId": external_id,     #goodreads numeric id
-            "title": title,
-            "authors": authors,
-            #"publishedYear": published_year,
-            "pageCount": page_count,
-            #"publisher": None,             #would need to grab for other page
-            #"categories": None,            #would need to grab for other page
-            "coverUrl": cover_url,
-            #"goodreadsUrl": book_url,
-        }
-
-        books.append(book_obj)
+    books = list(map(Book, sources, titles, authors_col, page_counts, cover_urls))
 
+    if return_total:
+        return books, extract_shelf_total(doc)
     return books
 
 
+def _page_url(parsed, qs: dict, page: int) -> str:
+    """
+    Rebuild the shelf url for one page from the already parsed base url.
+    """
+    qs["page"] = str(page)
+    return urlunparse(parsed._replace(query=urlencode(qs)))
+
+
+def _fetch_page(page_url: str,
+                use_cache: bool = True) -> tuple[list[Book], int | None]:
+    """
+    Fetch and parse one page of a paginated Goodreads shelf.
+    Returns the page's books and the shelf total (if the page shows it).
+    """
+    html = load_html(page_url, use_cache=use_cache)
+    return parse_shelf(html, shelf_url=page_url, return_total=True)
+
+
 def main() -> None:
     ap = argparse.ArgumentParser()
     ap.add_argument(
@@ -275,7 +467,18 @@ def main() -> None:
             "or local HTML file path"
         ),
     )
+    ap.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=f"ignore pages cached in {CACHE_DIR} and fetch everything again",
+    )
+    ap.add_argument(
+        "--utf8",
+        action="store_true",
+        help="write raw UTF-8 JSON instead of ASCII with \\u escapes (faster with orjson)",
+    )
     args = ap.parse_args()
+    use_cache = not args.no_cache
     resolved = resolve_input(args.shelf)
 
     #just parse once if local html file
@@ -285,46 +488,87 @@ def main() -> None:
 
     #paginate goodreads.com shelf url
     elif "goodreads.com/review/list" in resolved:
-        all_books: list[dict] = []
-        page = 1
+        #parse the url once, each page only swaps in its own page number
+        parsed = urlparse(resolved)
+        qs = dict(parse_qsl(parsed.query))
 
-        while True:
-            #parse and rebuild url with per_page + page
-            parsed = urlparse(resolved)
-            qs = dict(parse_qsl(parsed.query))
-
-            #max per_page goodreads will give is 200, yet this fails at 200?
-            #largest working value I found was 15 might need to tweak
-            qs.setdefault("per_page", "10")
-            qs["page"] = str(page)
-
-            page_url = urlunparse(parsed._replace(query=urlencode(qs)))
-
-            html = load_html(page_url)
-            page_books = parse_shelf(html, shelf_url=page_url)
-
-            if not page_books:
-                break
+        #max per_page goodreads will give is 200, yet this fails at 200?
+        #largest working value I found was 15 might need to tweak
+        qs.setdefault("per_page", "10")
+        try:
+            per_page = int(qs["per_page"])
+        except ValueError:
+            per_page = None
 
-            all_books.extend(page_books)
+        #page 1 also says how many books are on the shelf in total
+        first_books, total = _fetch_page(_page_url(parsed, qs, 1), use_cache)
+        all_books: list[Book] = list(first_books)
 
-            #if fewer than per page (per_page), then scraper is at the last page
+        with ThreadPoolExecutor(max_workers=PAGE_WORKERS) as pool:
             try:
-                per_page = int(qs["per_page"])
-            except ValueError:
-                per_page = None
-
-            if per_page is None or len(page_books) < per_page:
-                break
-
-            page += 1
+                if per_page and total is not None:
+                    #known number of pages, fetch exactly those
+                    n_pages = -(-total // per_page)
+                    futures = {
+                        pool.submit(_fetch_page, _page_url(parsed, qs, p), use_cache): p
+                        for p in range(2, n_pages + 1)
+                    }
+                    #collect as they finish so a failed page surfaces right away
+                    results: dict[int, list[Book]] = {}
+                    for fut in as_completed(futures):
+                        results[futures[fut]] = fut.result()[0]
+
+                    for p in sorted(results):
+                        all_books.extend(results[p])
+                else:
+                    #no total on the page, so speculatively fetch the next few pages
+                    #at once until one comes back short
+                    #(without a usable per_page we can't tell the last page at all)
+                    page = 2
+                    done = not first_books or per_page is None or len(first_books) < per_page
+
+                    while not done:
+                        futures = {
+                            pool.submit(_fetch_page, _page_url(parsed, qs, p), use_cache): p
+                            for p in range(page, page + PAGE_WORKERS)
+                        }
+                        results = {}
+                        for fut in as_completed(futures):
+                            results[futures[fut]] = fut.result()[0]
+
+                        for p in sorted(results):
+                            page_books = results[p]
+                            all_books.extend(page_books)
+
+                            #if fewer than per page (per_page), then scraper is at the last page
+                            #anything fetched past it is thrown away
+                            if not page_books or len(page_books) < per_page:
+                                done = True
+                                break
+
+                        page += PAGE_WORKERS
+            except BaseException:
+                #a page failed (or ctrl-c): drop the queued pages, otherwise
+                #leaving the with block would still fetch every one of them
+                pool.shutdown(wait=False, cancel_futures=True)
+                raise
 
         books = all_books
     else:
-        html = load_html(resolved)
+        html = load_html(resolved, use_cache=use_cache)
         books = parse_shelf(html, shelf_url=resolved)
 
-    json.dump(books, fp=sys.stdout, indent=2, ensure_ascii=True)
+    records = [book._asdict() for book in books]
+    if not args.utf8:
+        json.dump(records, fp=sys.stdout, indent=2, ensure_ascii=True)
+        return
+
+    #same utf-8 bytes with or without orjson, written straight to the byte stream
+    if orjson:
+        out = orjson.dumps(records, option=orjson.OPT_INDENT_2)
+    else:
+        out = json.dumps(records, indent=2, ensure_ascii=False).encode("utf-8")
+    sys.stdout.buffer.write(out)
 
 
 
@@ -1,24 +1,72 @@
 import requests
+import soupsieve
+from urllib3.util.request import ACCEPT_ENCODING
 from bs4 import BeautifulSoup
 
+try:
+    # Lexbor (C) HTML parser, a lot faster than BeautifulSoup on a page this size
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
 URL = "https://en.wikipedia.org/wiki/List_of_Game_Boy_games"
 
+# CSS selectors compiled once and reused for every table/row
+TABLE_SEL = soupsieve.compile("table.wikitable")
+ROW_SEL = soupsieve.compile("tr")
+CELL_SEL = soupsieve.compile("th, td")
+DATA_CELL_SEL = soupsieve.compile("td")
+
 # 1) Fetch with a desktop User-Agent + sanity checks
-headers = {
+session = requests.Session()
+session.headers.update({
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-                  "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-}
-resp = requests.get(URL, headers=headers, timeout=20)
+                  "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    # br/zstd only get offered when brotli/zstandard are installed to decode them
+    "Accept-Encoding": ACCEPT_ENCODING,
+})
+resp = session.get(URL, timeout=20)
 resp.raise_for_status()
 
 # Optional: see what we actually got
-print("HTTP", resp.status_code, "bytes:", len(resp.text))
+print("HTTP", resp.status_code, "bytes:", len(resp.content))
+
+# 2) Parse the raw bytes, the parser picks the encoding up from the page itself
+#    (selectolax if installed, otherwise BeautifulSoup + lxml)
+if LexborHTMLParser:
+    tree = LexborHTMLParser(resp.content)
+    # Lexbor's text() includes <style>/<script> contents (wiki cells carry inline
+    # TemplateStyles), BeautifulSoup's get_text() skips them, so drop them up front
+    tree.strip_tags(["style", "script"])
+
+    def find_tables():
+        return tree.css("table.wikitable")
+
+    def rows_of(tbl):
+        return tbl.css("tr")
+
+    def first_cell(row, data_only=False):
+        return row.css_first("td" if data_only else "th, td")
+
+    def cell_text(cell):
+        return cell.text(strip=True)
+else:
+    soup = BeautifulSoup(resp.content, "lxml")
+
+    def find_tables():
+        return TABLE_SEL.select(soup)
+
+    def rows_of(tbl):
+        return ROW_SEL.select(tbl)
+
+    def first_cell(row, data_only=False):
+        return (DATA_CELL_SEL if data_only else CELL_SEL).select_one(row)
 
-# 2) Parse the HTML text (not .content) to avoid odd warnings
-soup = BeautifulSoup(resp.text, "html.parser")
+    def cell_text(cell):
+        return cell.get_text(strip=True)
 
 # 3) Find ALL wikitables (there are many on this page, A–Z)
-tables = soup.select("table.wikitable")
+tables = find_tables()
 if not tables:
     # Dump a short snippet to diagnose what came back
     print("No tables found. First 400 chars of page:\n", resp.text[:400])
@@ -27,25 +75,30 @@ if not tables:
 # 4) Extract the first column (game title) from every table
 wordlist = []
 for tbl in tables:
-    rows = tbl.find_all("tr")
+    rows = rows_of(tbl)
     if not rows:
         continue
     # Try to detect header and skip it
-    start_idx = 1 if rows[0].find_all(["th", "td"]) else 0
+    start_idx = 1 if first_cell(rows[0]) is not None else 0
     for row in rows[start_idx:]:
-        cells = row.find_all("td")
-        if not cells:
+        # only the first cell is needed, so don't collect the rest
+        cell = first_cell(row, data_only=True)
+        if cell is None:
             continue
-        title = cells[0].get_text(strip=True)
+        title = cell_text(cell)
         if title:
             wordlist.append(title)
 
 # 5) (Optional) de-dupe + sort for a cleaner list
-wordlist = sorted(set(wordlist), key=str.casefold)
+# casefold each title once; "Tetris" and "TETRIS" collapse to the first one seen
+seen = {}
+for w in wordlist:
+    seen.setdefault(w.casefold(), w)
+wordlist = [v for _, v in sorted(seen.items())]
 
 out_path = r"C:\Users\NTMat\Downloads\wordlist.txt"
-with open(out_path, "w", encoding="utf-8") as f:
-    for w in wordlist:
-        f.write(w + "\n")
+with open(out_path, "w", encoding="utf-8", newline="\n") as f:
+    f.write("\n".join(wordlist))
+    f.write("\n")
 
 print(f"Wrote {len(wordlist)} titles to {out_path}")